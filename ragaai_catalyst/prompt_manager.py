@@ -2,19 +2,55 @@ import os
 import requests
 import json
 import re
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .ragaai_catalyst import RagaAICatalyst
+from .utils import json_loads
 import copy
+import time
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_VAR_RE = re.compile(r'\{\{(.*?)\}\}')
+
+
+def _ttl_cache(method):
+    """
+    Memoize an instance method's result per arguments for ``self.cache_ttl`` seconds.
+
+    Entries are stored on the instance in ``self._cache`` and dropped by ``refresh()``.
+    Callers get a shallow copy, so mutating a returned list does not alter the cache.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (method.__name__,) + args
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] > now:
+            return copy.copy(entry[0])
+        value = method(self, *args)
+        self._cache[key] = (copy.copy(value), now + self.cache_ttl)
+        return value
+    return wrapper
+
 
 class PromptManager:
     NUM_PROJECTS = 100
     TIMEOUT = 10
+    CACHE_TTL = 60
+    PROJECT_ID_CACHE_SIZE = 128
+    _project_ids = OrderedDict()  # (base url, token, project name) -> project id, least recent first
+    _project_ids_lock = threading.Lock()
 
-    def __init__(self, project_name):
+    def __init__(self, project_name, cache_ttl=CACHE_TTL):
         """
         Initialize the PromptManager with a project name.
 
         Args:
             project_name (str): The name of the project.
+            cache_ttl (float, optional): Seconds for which prompt and version name lists are cached. Defaults to 60.
 
         Raises:
             requests.RequestException: If there's an error with the API request.
@@ -24,38 +60,167 @@ class PromptManager:
         self.base_url = f"{RagaAICatalyst.BASE_URL}/playground/prompt"
         self.timeout = 10
         self.size = 99999 #Number of projects to fetch
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+        self._session = self._create_session()
+        self._session.headers.update({
+            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+        })
 
-        try:
-            response = requests.get(
-                f"{RagaAICatalyst.BASE_URL}/v2/llm/projects?size={self.size}",
-                headers={
-                    "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-                },
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            # logger.debug("Projects list retrieved successfully")
+        self.project_id = self._get_project_id()
+
+        self.headers = {
+                "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                "X-Project-Id": str(self.project_id)
+            }
+        self._session.headers.update(self.headers)
+        self._prompt = Prompt(self._session)
+
+    def _get_project_id(self):
+        """
+        Get the ID of the project, validating that it exists.
+
+        Project IDs are cached per base URL, token and project name, so that creating
+        further PromptManagers for the same project skips the lookup. The cache keeps
+        the PROJECT_ID_CACHE_SIZE most recently used IDs.
+
+        Returns:
+            int: The ID of the project.
+
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+            ValueError: If the project is not found.
+        """
+        cache_key = self._project_id_key()
+        with PromptManager._project_ids_lock:
+            project_id = PromptManager._project_ids.get(cache_key)
+            if project_id is not None:
+                PromptManager._project_ids.move_to_end(cache_key)
+                return project_id
+
+        project_id = self._fetch_project_id()
+        with PromptManager._project_ids_lock:
+            PromptManager._project_ids[cache_key] = project_id
+            PromptManager._project_ids.move_to_end(cache_key)
+            while len(PromptManager._project_ids) > self.PROJECT_ID_CACHE_SIZE:
+                PromptManager._project_ids.popitem(last=False)
+        return project_id
+
+    def _project_id_key(self):
+        """
+        Get the key of this project in the project ID cache.
+
+        Returns:
+            tuple: The base URL, token and project name.
+        """
+        return (RagaAICatalyst.BASE_URL, os.getenv("RAGAAI_CATALYST_TOKEN"), self.project_name)
+
+    def _fetch_project_id(self):
+        """
+        Look up the ID of the project on the server.
+
+        The projects are first filtered by name on the server; the full project list
+        is only fetched if that filter is rejected or does not return the project.
 
-            project_list = [
-                project["name"] for project in response.json()["data"]["content"]
-            ]
-            self.project_id = [
-            project["id"] for project in response.json()["data"]["content"] if project["name"]==project_name
-            ][0]
+        Returns:
+            int: The ID of the project.
 
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+            ValueError: If the project is not found.
+        """
+        url = f"{RagaAICatalyst.BASE_URL}/v2/llm/projects"
+        try:
+            response = self._session.get(url, params={"name": self.project_name}, timeout=self.timeout)
+            project_id = None
+            if response.status_code not in (400, 404):
+                response.raise_for_status()
+                project_id = self._find_project_id(response)
+            if project_id is None:
+                response = self._session.get(url, params={"size": self.size}, timeout=self.timeout)
+                response.raise_for_status()
+                # logger.debug("Projects list retrieved successfully")
+                project_id = self._find_project_id(response)
         except (KeyError, json.JSONDecodeError) as e:
             raise ValueError(f"Error parsing project list: {str(e)}")
 
-        if self.project_name not in project_list:
+        if project_id is None:
             raise ValueError("Project not found. Please enter a valid project name")
+        return project_id
+
+    def _find_project_id(self, response):
+        """
+        Find the ID of the project in a project list response.
 
+        Args:
+            response (requests.Response): The project list response.
 
-        self.headers = {
-                "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-                "X-Project-Id": str(self.project_id)
-            }
+        Returns:
+            int: The ID of the project, or None if it is not in the response.
+        """
+        projects = json_loads(response.content)["data"]["content"]
+        return next(
+            (project["id"] for project in projects if project["name"] == self.project_name),
+            None,
+        )
+
+    def _create_session(self):
+        """
+        Create a requests session that keeps connections to the catalyst host alive.
+
+        Returns:
+            requests.Session: A session with a pooled, retrying HTTP adapter mounted.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=["GET"],
+            ),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """
+        Close the underlying HTTP session and release pooled connections.
+        """
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def refresh(self):
+        """
+        Drop the cached prompt and version name lists so the next call fetches them again,
+        and look up the project ID again in case the project was deleted or recreated.
 
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+            ValueError: If the project is no longer found.
+        """
+        self._cache.clear()
+        with PromptManager._project_ids_lock:
+            PromptManager._project_ids.pop(self._project_id_key(), None)
+        self.project_id = self._get_project_id()
+        self.headers["X-Project-Id"] = str(self.project_id)
+        self._session.headers.update(self.headers)
 
+    @_ttl_cache
     def list_prompts(self):
         """
         List all available prompts.
@@ -66,9 +231,8 @@ class PromptManager:
         Raises:
             requests.RequestException: If there's an error with the API request.
         """
-        prompt = Prompt()
         try:
-            prompt_list = prompt.list_prompts(self.base_url, self.headers, self.timeout)
+            prompt_list = self._prompt.list_prompts(self.base_url, self.timeout)
             return prompt_list
         except requests.RequestException as e:
             raise requests.RequestException(f"Error listing prompts: {str(e)}")
@@ -96,21 +260,37 @@ class PromptManager:
         if prompt_name not in prompt_list:
             raise ValueError("Prompt not found. Please enter a valid prompt name")
 
-        try:
-            prompt_versions = self.list_prompt_versions(prompt_name)
-        except requests.RequestException as e:
-            raise requests.RequestException(f"Error fetching prompt versions: {str(e)}")
+        if version:
+            try:
+                version_names = self._list_version_names(prompt_name)
+            except requests.RequestException as e:
+                raise requests.RequestException(f"Error fetching prompt versions: {str(e)}")
 
-        if version and version not in prompt_versions.keys():
-            raise ValueError("Version not found. Please enter a valid version name")
+            if version not in version_names:
+                raise ValueError("Version not found. Please enter a valid version name")
 
-        prompt = Prompt()
         try:
-            prompt_object = prompt.get_prompt(self.base_url, self.headers, self.timeout, prompt_name, version)
+            prompt_object = self._prompt.get_prompt(self.base_url, self.timeout, prompt_name, version)
             return prompt_object
         except requests.RequestException as e:
             raise requests.RequestException(f"Error fetching prompt: {str(e)}")
 
+    @_ttl_cache
+    def _list_version_names(self, prompt_name):
+        """
+        List the version names of a specific prompt.
+
+        Args:
+            prompt_name (str): The name of the prompt.
+
+        Returns:
+            list: A list of version names.
+
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+        """
+        return self._prompt._list_version_names(self.base_url, self.timeout, prompt_name)
+
     def list_prompt_versions(self, prompt_name):
         """
         List all versions of a specific prompt.
@@ -133,28 +313,35 @@ class PromptManager:
         if prompt_name not in prompt_list:
             raise ValueError("Prompt not found. Please enter a valid prompt name")
         
-        prompt = Prompt()
         try:
-            prompt_versions = prompt.list_prompt_versions(self.base_url, self.headers, self.timeout, prompt_name)
+            version_names = self._list_version_names(prompt_name)
+            prompt_versions = self._prompt.list_prompt_versions(
+                self.base_url, self.timeout, prompt_name, version_names
+            )
             return prompt_versions
         except requests.RequestException as e:
             raise requests.RequestException(f"Error fetching prompt versions: {str(e)}")
 
 
 class Prompt:
-    def __init__(self):
+    MAX_WORKERS = 8
+
+    def __init__(self, session=None):
         """
         Initialize the Prompt class.
+
+        Args:
+            session (requests.Session, optional): The session used for API requests,
+                carrying the authorization headers. Defaults to a new session.
         """
-        pass
+        self.session = session if session is not None else requests.Session()
 
-    def list_prompts(self, url, headers, timeout):
+    def list_prompts(self, url, timeout):
         """
         List all available prompts.
 
         Args:
             url (str): The base URL for the API.
-            headers (dict): The headers to be used in the request.
             timeout (int): The timeout for the request.
 
         Returns:
@@ -165,22 +352,21 @@ class Prompt:
             ValueError: If there's an error parsing the prompt list.
         """
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = self.session.get(url, timeout=timeout)
             response.raise_for_status()
-            prompt_list = [prompt["name"] for prompt in response.json()["data"]]                        
+            prompt_list = [prompt["name"] for prompt in json_loads(response.content)["data"]]                        
             return prompt_list
         except requests.RequestException as e:
             raise requests.RequestException(f"Error listing prompts: {str(e)}")
         except (KeyError, json.JSONDecodeError) as e:
             raise ValueError(f"Error parsing prompt list: {str(e)}")
 
-    def _get_response_by_version(self, base_url, headers, timeout, prompt_name, version):
+    def _get_response_by_version(self, base_url, timeout, prompt_name, version):
         """
         Get a specific version of a prompt.
 
         Args:
             base_url (str): The base URL for the API.
-            headers (dict): The headers to be used in the request.
             timeout (int): The timeout for the request.
             prompt_name (str): The name of the prompt.
             version (str): The version of the prompt.
@@ -193,8 +379,8 @@ class Prompt:
             ValueError: If there's an error parsing the prompt version.
         """
         try:
-            response = requests.get(f"{base_url}/version/{prompt_name}?version={version}",
-                                    headers=headers, timeout=timeout)
+            response = self.session.get(f"{base_url}/version/{prompt_name}?version={version}",
+                                        timeout=timeout)
             response.raise_for_status()
         except requests.RequestException as e:
             raise requests.RequestException(f"Error fetching prompt version: {str(e)}")
@@ -202,13 +388,12 @@ class Prompt:
             raise ValueError(f"Error parsing prompt version: {str(e)}")
         return response
 
-    def _get_response(self, base_url, headers, timeout, prompt_name):
+    def _get_response(self, base_url, timeout, prompt_name):
         """
         Get the latest version of a prompt.
 
         Args:
             base_url (str): The base URL for the API.
-            headers (dict): The headers to be used in the request.
             timeout (int): The timeout for the request.
             prompt_name (str): The name of the prompt.
 
@@ -220,8 +405,8 @@ class Prompt:
             ValueError: If there's an error parsing the prompt version.
         """
         try:
-            response = requests.get(f"{base_url}/version/{prompt_name}",
-                                headers=headers, timeout=timeout)
+            response = self.session.get(f"{base_url}/version/{prompt_name}",
+                                        timeout=timeout)
             response.raise_for_status()
         except requests.RequestException as e:
             raise requests.RequestException(f"Error fetching prompt version: {str(e)}")
@@ -229,13 +414,12 @@ class Prompt:
             raise ValueError(f"Error parsing prompt version: {str(e)}")
         return response
 
-    def _get_prompt_by_version(self, base_url, headers, timeout, prompt_name, version):
+    def _get_prompt_by_version(self, base_url, timeout, prompt_name, version):
         """
         Get a specific version of a prompt.
 
         Args:
             base_url (str): The base URL for the API.
-            headers (dict): The headers to be used in the request.
             timeout (int): The timeout for the request.
             prompt_name (str): The name of the prompt.
             version (str): The version of the prompt.
@@ -246,17 +430,16 @@ class Prompt:
         Raises:
             requests.RequestException: If there's an error with the API request.
         """
-        response = self._get_response_by_version(base_url, headers, timeout, prompt_name, version)
-        prompt_text = response.json()["data"]["docs"][0]["textFields"]
+        response = self._get_response_by_version(base_url, timeout, prompt_name, version)
+        prompt_text = json_loads(response.content)["data"]["docs"][0]["textFields"]
         return prompt_text
 
-    def get_prompt(self, base_url, headers, timeout, prompt_name, version=None):
+    def get_prompt(self, base_url, timeout, prompt_name, version=None):
         """
         Get a prompt, optionally specifying a version.
 
         Args:
             base_url (str): The base URL for the API.
-            headers (dict): The headers to be used in the request.
             timeout (int): The timeout for the request.
             prompt_name (str): The name of the prompt.
             version (str, optional): The version of the prompt. Defaults to None.
@@ -268,27 +451,55 @@ class Prompt:
             requests.RequestException: If there's an error with the API request.
         """
         if version:
-            response = self._get_response_by_version(base_url, headers, timeout, prompt_name, version)
-            prompt_text = response.json()["data"]["docs"][0]["textFields"]
-            prompt_parameters = response.json()["data"]["docs"][0]["modelSpecs"]["parameters"]
-            model = response.json()["data"]["docs"][0]["modelSpecs"]["model"]
+            response = self._get_response_by_version(base_url, timeout, prompt_name, version)
         else:
-            response = self._get_response(base_url, headers, timeout, prompt_name)
-            prompt_text = response.json()["data"]["docs"][0]["textFields"]
-            prompt_parameters = response.json()["data"]["docs"][0]["modelSpecs"]["parameters"]
-            model = response.json()["data"]["docs"][0]["modelSpecs"]["model"]
+            response = self._get_response(base_url, timeout, prompt_name)
+        doc = json_loads(response.content)["data"]["docs"][0]
+        prompt_text = doc["textFields"]
+        prompt_parameters = doc["modelSpecs"]["parameters"]
+        model = doc["modelSpecs"]["model"]
         return PromptObject(prompt_text, prompt_parameters, model)
 
 
-    def list_prompt_versions(self, base_url, headers, timeout, prompt_name):
+    def _list_version_names(self, base_url, timeout, prompt_name):
+        """
+        List the version names of a specific prompt without fetching their texts.
+
+        Args:
+            base_url (str): The base URL for the API.
+            timeout (int): The timeout for the request.
+            prompt_name (str): The name of the prompt.
+
+        Returns:
+            list: A list of version names.
+
+        Raises:
+            requests.RequestException: If there's an error with the API request.
+            ValueError: If there's an error parsing the prompt versions.
+        """
+        try:
+            response = self.session.get(f"{base_url}/{prompt_name}/version",
+                                        timeout=timeout)
+            response.raise_for_status()
+            return [version["name"] for version in json_loads(response.content)["data"]]
+        except requests.RequestException as e:
+            raise requests.RequestException(f"Error listing prompt versions: {str(e)}")
+        except (KeyError, json.JSONDecodeError) as e:
+            raise ValueError(f"Error parsing prompt versions: {str(e)}")
+
+    def list_prompt_versions(self, base_url, timeout, prompt_name, version_names=None):
         """
         List all versions of a specific prompt.
 
+        The prompt texts of the individual versions are fetched concurrently over
+        the shared session.
+
         Args:
             base_url (str): The base URL for the API.
-            headers (dict): The headers to be used in the request.
             timeout (int): The timeout for the request.
             prompt_name (str): The name of the prompt.
+            version_names (list, optional): The version names, if already known. Defaults to None,
+                in which case they are fetched.
 
         Returns:
             dict: A dictionary mapping version names to prompt texts.
@@ -297,15 +508,15 @@ class Prompt:
             requests.RequestException: If there's an error with the API request.
             ValueError: If there's an error parsing the prompt versions.
         """
+        if version_names is None:
+            version_names = self._list_version_names(base_url, timeout, prompt_name)
         try:
-            response = requests.get(f"{base_url}/{prompt_name}/version",
-                                    headers=headers, timeout=timeout)
-            response.raise_for_status()
-            version_names = [version["name"] for version in response.json()["data"]]
-            prompt_versions = {}
-            for version in version_names:
-                prompt_versions[version] = self._get_prompt_by_version(base_url, headers, timeout, prompt_name, version)
-            return prompt_versions
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                prompt_texts = executor.map(
+                    lambda version: self._get_prompt_by_version(base_url, timeout, prompt_name, version),
+                    version_names,
+                )
+                return dict(zip(version_names, prompt_texts))
         except requests.RequestException as e:
             raise requests.RequestException(f"Error listing prompt versions: {str(e)}")
         except (KeyError, json.JSONDecodeError) as e:
@@ -325,21 +536,21 @@ class PromptObject:
         self.text = text
         self.parameters = parameters
         self.model = model
+        self.variables = self._extract_variables()
     
-    def _extract_variable_from_content(self, content):
+    def _extract_variables(self):
         """
-        Extract variables from the content.
-
-        Args:
-            content (str): The content containing variables.
+        Extract the variables from the content of all messages of the prompt.
 
         Returns:
-            list: A list of variable names found in the content.
+            frozenset: The variable names found in the prompt text.
         """
-        pattern = r'\{\{(.*?)\}\}'
-        matches = re.findall(pattern, content)
-        variables = [match.strip() for match in matches if '"' not in match]
-        return variables
+        return frozenset(
+            match.strip()
+            for item in self.text
+            for match in _VAR_RE.findall(item["content"])
+            if '"' not in match
+        )
 
     def _add_variable_value_to_content(self, content, user_variables):
         """
@@ -352,13 +563,13 @@ class PromptObject:
         Returns:
             str: The content with variables replaced by their values.
         """
-        variables = self._extract_variable_from_content(content)
-        for key, value in user_variables.items():
-            if not isinstance(value, str):
-                raise ValueError(f"Value for variable '{key}' must be a string, not {type(value).__name__}")
-            if key in variables:
-                content = content.replace(f"{{{{{key}}}}}", value)
-        return content
+        def replace(match):
+            name = match.group(1)
+            if '"' in name:
+                return match.group(0)
+            return user_variables.get(name.strip(), match.group(0))
+
+        return _VAR_RE.sub(replace, content)
 
     def compile(self, **kwargs):
         """
@@ -373,17 +584,18 @@ class PromptObject:
         Raises:
             ValueError: If there are missing or extra variables, or if a value is not a string.
         """
-        required_variables = self.get_variables()
-        provided_variables = set(kwargs.keys())
-
-        missing_variables = [item for item in required_variables if item not in provided_variables]
-        extra_variables = [item for item in provided_variables if item not in required_variables]
+        missing_variables = [item for item in self.variables if item not in kwargs]
+        extra_variables = [item for item in kwargs if item not in self.variables]
 
         if missing_variables:
             raise ValueError(f"Missing variable(s): {', '.join(missing_variables)}")
         if extra_variables:
             raise ValueError(f"Extra variable(s) provided: {', '.join(extra_variables)}")
 
+        for key, value in kwargs.items():
+            if not isinstance(value, str):
+                raise ValueError(f"Value for variable '{key}' must be a string, not {type(value).__name__}")
+
         updated_text = copy.deepcopy(self.text)
 
         for item in updated_text:
@@ -398,15 +610,7 @@ class PromptObject:
         Returns:
             list: A list of variable names found in the prompt text.
         """
-        variables = set()
-        for item in self.text:
-            content = item["content"]
-            for var in self._extract_variable_from_content(content):
-                variables.add(var)
-        if variables:
-            return list(variables)
-        else:
-            return []
+        return list(self.variables)
     
     def _convert_value(self, value, type_):
         """
@@ -3,12 +3,15 @@ import json
 import os
 import uuid
 import logging
+import threading
 import aiohttp
 import asyncio
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from opentelemetry.sdk.trace.export import SpanExporter
+from opentelemetry.trace import format_trace_id
 from ..utils import get_unique_key
+from ...utils import json_dumps, json_loads
 from .raga_exporter import RagaExporter
 
 # Set up logging
@@ -17,6 +20,15 @@ logger = logging.getLogger(__name__)
 
 
 class FileSpanExporter(SpanExporter):
+    # Append-only, binary, not inherited by child processes
+    JSONL_FLAGS = (
+        os.O_WRONLY
+        | os.O_CREAT
+        | os.O_APPEND
+        | getattr(os, "O_CLOEXEC", 0)
+        | getattr(os, "O_BINARY", 0)
+    )
+
     def __init__(
         self,
         project_name=None,
@@ -24,6 +36,7 @@ class FileSpanExporter(SpanExporter):
         metadata=None,
         pipeline=None,
         raga_client=None,
+        upload_timeout=30,
     ):
         """
         Initializes the FileSpanExporter.
@@ -33,6 +46,7 @@ class FileSpanExporter(SpanExporter):
             session_id (str, optional): The session ID. Defaults to None.
             metadata (dict, optional): Metadata information. Defaults to None.
             pipeline (dict, optional): The pipeline configuration. Defaults to None.
+            upload_timeout (int, optional): Seconds shutdown waits for pending uploads. Defaults to 30.
 
         Returns:
             None
@@ -41,6 +55,11 @@ class FileSpanExporter(SpanExporter):
         self.session_id = session_id if session_id is not None else str(uuid.uuid4())
         self.metadata = metadata
         self.pipeline = pipeline
+        # add the ids
+        if self.metadata is not None:
+            self.metadata["id"] = get_unique_key(self.metadata)
+        if self.pipeline is not None:
+            self.pipeline["id"] = get_unique_key(self.pipeline)
         self.sync_file = None
         # Set the temp directory to be output dir
         os.makedirs(
@@ -48,10 +67,19 @@ class FileSpanExporter(SpanExporter):
         )
         self.dir_name = os.path.join(tempfile.gettempdir(), "raga_temp")
         self.raga_client = raga_client
+        self.upload_timeout = upload_timeout
+        self._jsonl_fds = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread = None
+        self._upload_futures = []
+        self._aio_session = None
 
     def export(self, spans):
         """
-        Export spans to a JSON file with additional metadata and pipeline information.
+        Export spans to a JSONL file per trace. The first line of the file is a header
+        with the project, session, metadata and pipeline information; every export
+        appends one line holding only its spans.
 
         Args:
             spans (list): List of spans to be exported.
@@ -59,60 +87,230 @@ class FileSpanExporter(SpanExporter):
         Returns:
             None
         """
-        traces_list = [json.loads(span.to_json()) for span in spans]
-        trace_id = traces_list[0]["context"]["trace_id"]
-
-        self.filename = os.path.join(self.dir_name, trace_id + ".jsonl")
-
-        # add the ids
-        self.metadata["id"] = get_unique_key(self.metadata)
-        self.pipeline["id"] = get_unique_key(self.pipeline)
+        # to_json pretty-prints with indent=4 by default; compact output parses faster.
+        # It is parsed with the stdlib, which accepts the NaN/Infinity tokens it may emit.
+        traces_list = [json.loads(span.to_json(indent=None)) for span in spans]
+        trace_id = f"0x{format_trace_id(spans[0].context.trace_id)}"
 
         # add prompt id to each trace in trace_list
         for t in traces_list:
             t["prompt_id"] = get_unique_key(t)
+        payload = json_dumps({"traces": traces_list}) + b"\n"
+
+        with self._lock:
+            self.filename = os.path.join(self.dir_name, trace_id + ".jsonl")
+            json_file_path = os.path.join(self.dir_name, trace_id + ".json")
+
+            fd = self._jsonl_fds.get(self.filename)
+            is_new_trace = False
+            if fd is None:
+                fd = os.open(self.filename, self.JSONL_FLAGS, 0o644)
+                try:
+                    # An empty file has no header yet, so this is the trace's first export
+                    is_new_trace = os.fstat(fd).st_size == 0
+                    if is_new_trace:
+                        header = json_dumps(self._trace_header(trace_id)) + b"\n"
+                        payload = header + payload
+                except BaseException:
+                    # Leave nothing registered so a later export still writes the header
+                    os.close(fd)
+                    raise
+                self._jsonl_fds[self.filename] = fd
+            logger.debug(f"Writing jsonl file: {self.filename}")
+            self._write_all(fd, payload)
+
+            # A new trace means the previous one is complete: hand it to the upload loop
+            if is_new_trace:
+                if self.sync_file is not None:
+                    self._queue_upload(self.sync_file)
+                self.sync_file = json_file_path
+            # Only the current trace keeps its JSONL file open; late spans of other
+            # traces reopen theirs, so interleaved traces cannot leak descriptors
+            if json_file_path != self.sync_file:
+                self._close_jsonl_file(self.filename)
+        # asyncio.run(self.server_upload(json_file_path)
+
+    def _trace_header(self, trace_id):
+        """
+        Build the header written once as the first line of a trace's JSONL file.
+
+        Args:
+            trace_id (str): The trace ID.
 
-        export_data = {
+        Returns:
+            dict: The project, trace, session, metadata and pipeline information.
+        """
+        return {
             "project_name": self.project_name,
             "trace_id": trace_id,
             "session_id": self.session_id,
-            "traces": traces_list,
             "metadata": self.metadata,
             "pipeline": self.pipeline,
         }
 
-        json_file_path = os.path.join(self.dir_name, trace_id + ".json")
-        with open(self.filename, "a", encoding="utf-8") as f:
-            logger.debug(f"Writing jsonl file: {self.filename}")
-            f.write(json.dumps(export_data) + "\n")
-
-
-        tracer_json_file_path = os.path.join(os.getcwd(), "tracer_debug.json")
-        if os.path.exists(json_file_path):
-            with open(json_file_path, "r") as f:
-                data = json.load(f)
-                data.append(export_data)
-            with open(json_file_path, "w") as f:
-                logger.debug(f"Appending to json file: {json_file_path}")
-                json.dump(data, f)    
-        else:
-            with open(json_file_path, "w") as f:
-                logger.debug(f"Writing json  file: {json_file_path}")
-                json_data = [export_data]
-                json.dump(json_data, f)
-                if self.sync_file is not None:
-                    # self._upload_task = self._run_async(self._upload_traces(json_file_path= self.sync_file))
-                    self._run_async(self._upload_traces(json_file_path=self.sync_file))
-                self.sync_file = json_file_path
-        # asyncio.run(self.server_upload(json_file_path)
+    def _export_record(self, header, traces_list):
+        """
+        Join a trace header with the spans of one export into the uploaded record.
+
+        Args:
+            header (dict): The trace header.
+            traces_list (list): The spans of one export.
+
+        Returns:
+            dict: The record in the format expected by the RagaAICatalyst server.
+        """
+        return {
+            "project_name": header["project_name"],
+            "trace_id": header["trace_id"],
+            "session_id": header["session_id"],
+            "traces": traces_list,
+            "metadata": header["metadata"],
+            "pipeline": header["pipeline"],
+        }
+
+    @staticmethod
+    def _write_all(fd, payload):
+        """
+        Write the whole payload to a file descriptor.
+
+        Args:
+            fd (int): The file descriptor.
+            payload (bytes): The bytes to write.
+
+        Returns:
+            None
+        """
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+
+    def _close_jsonl_file(self, jsonl_file_path):
+        """
+        Close the open file descriptor of a JSONL file, if any.
+
+        Args:
+            jsonl_file_path (str): The path of the JSONL file.
+
+        Returns:
+            None
+        """
+        fd = self._jsonl_fds.pop(jsonl_file_path, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _write_json_file(self, json_file_path):
+        """
+        Write the JSON array uploaded for a trace from its JSONL file.
+
+        The array is built by streaming the JSONL lines once when the trace is
+        complete, joining the header line with each line of spans, rather than
+        rewriting the whole array on every export.
+
+        Args:
+            json_file_path (str): The path of the JSON file to write.
+
+        Returns:
+            None
+        """
+        jsonl_file_path = os.path.splitext(json_file_path)[0] + ".jsonl"
+        with open(jsonl_file_path, "rb") as src, open(json_file_path, "wb") as dst:
+            logger.debug(f"Writing json file: {json_file_path}")
+            dst.write(b"[")
+            header = None
+            separator = b""
+            for line in src:
+                line = line.rstrip(b"\n")
+                if not line:
+                    continue
+                if header is None:
+                    header = json_loads(line)
+                    continue
+                record = self._export_record(header, json_loads(line)["traces"])
+                dst.write(separator + json_dumps(record))
+                separator = b","
+            dst.write(b"]")
+
+    def _queue_upload(self, json_file_path):
+        """
+        Close the JSONL file of a completed trace, write its JSON file and schedule
+        uploading it on the upload event loop.
+
+        Called from export with self._lock held, so the JSON file is built while no
+        other export can append to the trace's JSONL file.
+
+        Args:
+            json_file_path (str): The path of the JSON file of the completed trace.
+
+        Returns:
+            None
+        """
+        self._close_jsonl_file(os.path.splitext(json_file_path)[0] + ".jsonl")
+        self._write_json_file(json_file_path)
+        self._run_async(self._upload_traces(json_file_path=json_file_path))
 
+    def _start_loop(self):
+        """Start the long-lived event loop thread used for uploads, if it is not running."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever, name="FileSpanExporterUpload", daemon=True
+            )
+            self._loop_thread.start()
+
+    def _stop_loop(self):
+        """Wait for pending uploads, then stop the event loop thread."""
+        if self._loop is None:
+            return
+        if self._upload_futures:
+            _, not_done = wait(self._upload_futures, timeout=self.upload_timeout)
+            for future in not_done:
+                future.cancel()
+            if not_done:
+                logger.error(
+                    f"Cancelled {len(not_done)} trace upload(s) still pending after {self.upload_timeout} seconds"
+                )
+            self._upload_futures = []
+        if self._aio_session is not None:
+            asyncio.run_coroutine_threadsafe(self._aio_session.close(), self._loop).result()
+            self._aio_session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+        self._loop = None
+        self._loop_thread = None
 
     def _run_async(self, coroutine):
-        """Run an asynchronous coroutine in a separate thread."""
-        loop = asyncio.new_event_loop()
-        with ThreadPoolExecutor() as executor:
-            future = executor.submit(lambda: loop.run_until_complete(coroutine))
-        return future.result()
+        """Schedule an asynchronous coroutine on the upload event loop without waiting for it."""
+        self._start_loop()
+        self._upload_futures = [f for f in self._upload_futures if not f.done()]
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        future.add_done_callback(self._log_upload_result)
+        self._upload_futures.append(future)
+        return future
+
+    @staticmethod
+    def _log_upload_result(future):
+        """Log a scheduled upload that raised or did not report success."""
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.error(f"Trace upload failed: {exc!r}")
+        elif future.result() != "Files uploaded successfully":
+            logger.error(f"Trace upload did not succeed: {future.result()}")
+
+    def _get_aio_session(self):
+        """
+        Return the aiohttp session shared by all uploads, creating it if needed.
+
+        Must be called from a coroutine running on the upload event loop, so that
+        the session and its keep-alive connection pool are bound to that loop.
+        """
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=75)
+            )
+        return self._aio_session
 
     async def _upload_traces(self, json_file_path=None):
         """
@@ -134,26 +332,38 @@ class FileSpanExporter(SpanExporter):
         Returns:
             A string indicating the status of the upload.
         """
-        async with aiohttp.ClientSession() as session:
-            if not os.getenv("RAGAAI_CATALYST_TOKEN"):
-                raise ValueError(
-                    "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces."
-                )
+        if not os.getenv("RAGAAI_CATALYST_TOKEN"):
+            raise ValueError(
+                "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces."
+            )
 
-            try:
-                upload_stat = await self.raga_client.check_and_upload_files(
-                    session=session,
-                    file_paths=[json_file_path],
-                )
-                return (
-                    "Files uploaded successfully"
-                    if upload_stat
-                    else "No files to upload"
-                )
-            except asyncio.TimeoutError:
-                return f"Upload timed out after {self.upload_timeout} seconds"
-            except Exception as e:
-                return f"Upload failed: {str(e)}"
+        try:
+            upload_stat = await self.raga_client.check_and_upload_files(
+                session=self._get_aio_session(),
+                file_paths=[json_file_path],
+            )
+            return (
+                "Files uploaded successfully"
+                if upload_stat
+                else "No files to upload"
+            )
+        except asyncio.TimeoutError:
+            return f"Upload timed out after {self.upload_timeout} seconds"
+        except Exception as e:
+            return f"Upload failed: {str(e)}"
 
     def shutdown(self):
-        pass
+        """
+        Close the open JSONL files and write the JSON file of the current trace so that
+        it can be uploaded. Pending uploads are given up to upload_timeout seconds to
+        finish before the upload loop is stopped.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for jsonl_file_path in list(self._jsonl_fds):
+                self._close_jsonl_file(jsonl_file_path)
+            if self.sync_file is not None:
+                self._write_json_file(self.sync_file)
+        self._stop_loop()
@@ -322,7 +322,7 @@ class RagaExporter:
             print(f"Uploading traces...")
             logger.debug(f"Uploading file:{file_path} with url {url}")
 
-            with open(file_path) as f:
+            with open(file_path, encoding="utf-8") as f:
                 data = f.read().replace("\n", "").replace("\r", "").encode()
 
             async with session.put(
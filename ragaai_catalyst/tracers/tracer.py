@@ -117,6 +117,7 @@ class Tracer:
             metadata=self.metadata,
             pipeline=self.pipeline,
             raga_client=self.raga_client,
+            upload_timeout=self.upload_timeout,
         )
         tracer_provider = trace_sdk.TracerProvider()
         tracer_provider.add_span_processor(SimpleSpanProcessor(self.filespanx))
@@ -1,7 +1,13 @@
 import os
+import json
 import requests
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +31,52 @@ logger = logging.getLogger(__name__)
 #     return token_response
 
 
+def json_dumps(obj):
+    """
+    Serialize an object to compact JSON bytes, using orjson when it is installed.
+
+    Input orjson rejects but the stdlib encoder accepts (such as integers beyond
+    64 bits) falls back to the stdlib, so what serializes does not depend on
+    whether orjson is installed.
+
+    Args:
+        obj: The JSON-serializable object.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_loads(data):
+    """
+    Deserialize a JSON document, using orjson when it is installed.
+
+    Documents orjson rejects but the stdlib decoder accepts (such as the NaN
+    written by the json_dumps fallback) are decoded with the stdlib.
+
+    Args:
+        data (Union[bytes, str]): The JSON document.
+
+    Returns:
+        The deserialized object.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
 def response_checker(response, context=""):
     """
     Checks the response status code and logs the appropriate message.